@@ -3,23 +3,33 @@
 __version__ = "0.1.0"
 
 import argparse
+import functools
 import os
 import sys
 import subprocess
 import platform
 from pathlib import Path
-import csv
 import shutil
 import json
 import tempfile
 import atexit
 import signal
+import stat
 import re
 import logging
 import shlex
-from typing import List, Optional, Dict, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional, Dict, Set, Tuple
 
-AUDIO_EXTENSIONS = {'.mp3', '.m4a', '.wav', '.flac', '.aac', '.ogg', '.wma'}
+# orjson is optional; it parses ffprobe output faster when available
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.wav', '.flac', '.aac', '.ogg', '.wma')
 
 # Security constants
 MAX_FILENAME_LENGTH = 255
@@ -27,9 +37,50 @@ MAX_PATH_LENGTH = 4096
 MAX_FILES_COUNT = 1000
 MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
 MAX_CHAPTER_NAME_LENGTH = 200
+MAX_FFMPEG_STDERR = 64 * 1024  # Keep only the tail of ffmpeg's stderr
+
+_CPU_COUNT = os.cpu_count() or 1
+
+# First ffmpeg release whose concat demuxer understands the 'chapter' directive
+CONCAT_CHAPTERS_MIN_FFMPEG = (5, 0)
+
+# Budget for per-chapter title arguments on the command line; Windows caps the
+# whole command line at 32767 characters, so longer sets use an FFMETADATA file
+MAX_INLINE_CHAPTER_ARGS_LENGTH = 16 * 1024
+
+# Precompiled sanitization patterns
+_FILENAME_SAFE = re.compile(r'[^a-zA-Z0-9._\-\s]')
+_CHAPTER_BAD = re.compile(r'[;&|`$(){}[\]<>"\\]')
+_TRAVERSAL_RE = re.compile(r'^/|\.\.')  # Absolute path or parent reference
+
+# Home directory, looked up once rather than on every output path check
+_HOME = os.path.expanduser('~')
+
+# Directories an absolute output path may live under
+_TRUSTED_OUTPUT_PREFIXES = (_HOME, '/tmp')
+
+# Translation table that deletes C0/C1 control characters
+_CTRL_DEL = dict.fromkeys(list(range(0x00, 0x20)) + list(range(0x7f, 0xa0)))
+
+# Global set to track temporary files for cleanup
+TEMP_FILES: Set[str] = set()
+
+# Stat results for paths that already passed validate_file_safety during this run,
+# reused later instead of stat-ing the same file again
+_VALIDATED: Dict[str, os.stat_result] = {}
 
-# Global list to track temporary files for cleanup
-TEMP_FILES = []
+# ffprobe results keyed by path (resolved by get_audio_files), so each file is probed once per run
+_PROBE_CACHE: Dict[str, dict] = {}
+
+# Persistent ffprobe cache, reused across runs for files that haven't changed
+PROBE_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(_HOME, '.cache'),
+    'audiobook-creator', 'probes.json'
+)
+MAX_PROBE_CACHE_SIZE = 50 * 1024 * 1024  # 50MB
+MAX_PROBE_CACHE_ENTRIES = 10000
+_disk_probe_cache: Optional[Dict[str, dict]] = None
+_disk_probe_cache_dirty = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -42,7 +93,7 @@ def sanitize_filename(filename: str) -> str:
         raise ValueError("Filename cannot be empty")
     
     # Remove dangerous characters and control characters
-    sanitized = re.sub(r'[^a-zA-Z0-9._\-\s]', '_', filename)
+    sanitized = _FILENAME_SAFE.sub('_', filename)
     
     # Remove leading dots and whitespace
     sanitized = sanitized.lstrip('. ')
@@ -64,10 +115,10 @@ def sanitize_chapter_name(name: str) -> str:
         return "Unnamed Chapter"
     
     # Remove shell metacharacters and dangerous characters
-    sanitized = re.sub(r'[;&|`$(){}[\]<>"\\]', '', name)
+    sanitized = _CHAPTER_BAD.sub('', name)
     
     # Remove control characters
-    sanitized = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', sanitized)
+    sanitized = sanitized.translate(_CTRL_DEL)
     
     # Limit length
     sanitized = sanitized[:MAX_CHAPTER_NAME_LENGTH]
@@ -130,16 +181,27 @@ def safe_path_join(base: str, *paths: str) -> str:
         security_logger.warning(f"Path validation failed: {e}")
         raise
 
-def validate_file_safety(file_path: Path) -> bool:
-    """Validate file is safe to process."""
+def validate_file_safety(file_path: Path, st: Optional[os.stat_result] = None) -> bool:
+    """Validate file is safe to process.
+    
+    st may be passed when the caller already has the file's stat result (e.g. from os.scandir).
+    """
+    key = str(file_path)
+    if key in _VALIDATED:
+        return True
+    
     try:
-        # Check if file exists and is a regular file
-        if not file_path.exists() or not file_path.is_file():
+        # A single stat answers existence, file type and size
+        if st is None:
+            st = os.stat(key)
+        
+        # Check if file is a regular file
+        if not stat.S_ISREG(st.st_mode):
             return False
         
         # Check file size
-        if file_path.stat().st_size > MAX_FILE_SIZE:
-            logger.warning(f"File too large: {file_path} ({file_path.stat().st_size} bytes)")
+        if st.st_size > MAX_FILE_SIZE:
+            logger.warning(f"File too large: {file_path} ({st.st_size} bytes)")
             return False
         
         # Check for suspicious filenames
@@ -148,7 +210,10 @@ def validate_file_safety(file_path: Path) -> bool:
             security_logger.warning(f"Suspicious filename detected: {filename}")
             return False
         
+        _VALIDATED[key] = st
         return True
+    except (FileNotFoundError, NotADirectoryError):
+        return False
     except (OSError, ValueError) as e:
         logger.error(f"File validation error: {e}")
         return False
@@ -166,7 +231,8 @@ def create_secure_temp(suffix: str = '', prefix: str = 'audiobook_') -> Tuple[in
 
 def cleanup_temp_files():
     """Clean up all temporary files."""
-    for temp_file in TEMP_FILES:
+    # Iterate over a copy so a signal-triggered cleanup can't change the set mid-loop
+    for temp_file in list(TEMP_FILES):
         try:
             if os.path.exists(temp_file):
                 os.remove(temp_file)
@@ -186,8 +252,12 @@ atexit.register(cleanup_temp_files)
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
+@functools.lru_cache(maxsize=None)
 def check_dependencies():
-    """Check if required dependencies are available and provide installation instructions if not."""
+    """Check if required dependencies are available and provide installation instructions if not.
+    
+    The result is cached, so repeated calls in one process only search PATH once.
+    """
     missing_deps = []
     
     if not shutil.which('ffmpeg'):
@@ -224,6 +294,34 @@ def check_dependencies():
     
     return True
 
+@functools.lru_cache(maxsize=None)
+def get_ffmpeg_version() -> Tuple[int, ...]:
+    """Return ffmpeg's (major, minor) version, or an empty tuple if it can't be determined."""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, timeout=10, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return ()
+    
+    # Release builds report e.g. "ffmpeg version 6.1.1" or "ffmpeg version n5.0"; git builds don't
+    match = re.match(rb'ffmpeg version n?(\d+)\.(\d+)', result.stdout)
+    return (int(match.group(1)), int(match.group(2))) if match else ()
+
+@functools.lru_cache(maxsize=None)
+def get_ffmpeg_encoders() -> frozenset:
+    """Return the names of the encoders ffmpeg was built with."""
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, timeout=10, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    
+    # Encoder lines look like " A....D aac                  AAC (Advanced Audio Coding)"
+    encoders = set()
+    for line in result.stdout.decode('utf-8', errors='replace').splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and len(parts[0]) == 6:
+            encoders.add(parts[1])
+    return frozenset(encoders)
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Combine audio files into an m4b audiobook with proper indexing')
     parser.add_argument('-i', '--input', required=True, help='Source directory containing audio files')
@@ -231,6 +329,7 @@ def parse_arguments():
     parser.add_argument('-I', '--index', help='TSV file with filename and chapter name mapping')
     parser.add_argument('-t', '--title', help='Override audiobook title')
     parser.add_argument('--quick', action='store_true', help='Use lower bitrate (16k) for faster processing')
+    parser.add_argument('--force-reencode', action='store_true', help='Re-encode AAC sources instead of copying the audio stream')
     parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
     return parser.parse_args()
 
@@ -250,19 +349,32 @@ def get_audio_files(input_dir: str) -> List[Path]:
         if any(part.startswith('.') for part in input_path.parts[1:]):
             security_logger.warning(f"Suspicious directory path: {input_dir}")
         
+        # Resolve once here so every discovered path is already absolute
+        input_path = input_path.resolve()
+        
         audio_files = []
         file_count = 0
         
-        for file_path in input_path.iterdir():
-            file_count += 1
-            if file_count > MAX_FILES_COUNT:
-                raise ValueError(f"Too many files in directory (max {MAX_FILES_COUNT})")
-            
-            if (file_path.is_file() and 
-                file_path.suffix.lower() in AUDIO_EXTENSIONS and
-                validate_file_safety(file_path)):
+        # scandir entries carry the file type, so filtering needs no extra stat calls
+        with os.scandir(input_path) as entries:
+            for entry in entries:
+                file_count += 1
+                if file_count > MAX_FILES_COUNT:
+                    raise ValueError(f"Too many files in directory (max {MAX_FILES_COUNT})")
                 
-                audio_files.append(file_path)
+                # str.endswith checks the whole extension tuple in one call
+                if (entry.name.lower().endswith(AUDIO_EXTENSIONS) and 
+                    entry.is_file()):
+                    
+                    # DirEntry caches its stat result, so validation doesn't stat again
+                    try:
+                        entry_stat = entry.stat()
+                    except OSError:
+                        continue  # Removed while scanning
+                    
+                    file_path = Path(entry.path)
+                    if validate_file_safety(file_path, entry_stat):
+                        audio_files.append(file_path)
         
         if not audio_files:
             logger.warning(f"No valid audio files found in {input_dir}")
@@ -289,15 +401,17 @@ def parse_index_file(index_file: str) -> Tuple[Dict[str, str], List[str]]:
         
         chapter_mapping = {}
         file_order = []
-        line_count = 0
         
         with open(index_file, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f, delimiter='\t')
-            for row in reader:
-                line_count += 1
+            # TSV fields cannot contain tabs or newlines, so a plain split is enough
+            for line_count, line in enumerate(f, 1):
                 if line_count > 10000:  # Prevent DoS
                     raise ValueError("Too many lines in index file")
                 
+                if not line.strip():
+                    continue
+                
+                row = line.rstrip('\r\n').split('\t', 2)
                 if len(row) >= 2:
                     filename = sanitize_filename(row[0].strip())
                     chapter_name = sanitize_chapter_name(row[1].strip())
@@ -315,58 +429,199 @@ def parse_index_file(index_file: str) -> Tuple[Dict[str, str], List[str]]:
         logger.error(f"Error parsing index file: {e}")
         raise
 
-def get_file_metadata(file_path: Path) -> Dict[str, str]:
-    """Extract metadata from audio file with security validation."""
+def _probe_file(file_path: Path) -> dict:
+    """Run ffprobe on a file and return the parsed format and stream JSON."""
+    cmd = [
+        'ffprobe', '-v', 'quiet', '-print_format', 'json',
+        '-show_format', '-show_streams', str(file_path)
+    ]
+    
+    # Run with timeout and capture output safely; both JSON parsers accept bytes directly
+    result = subprocess.run(
+        cmd, 
+        capture_output=True, 
+        timeout=30,  # 30 second timeout
+        check=True
+    )
+    
+    return _loads(result.stdout)
+
+def _load_probe_cache() -> Dict[str, dict]:
+    """Load the persistent probe cache, starting empty if it is missing or unreadable."""
+    global _disk_probe_cache
+    if _disk_probe_cache is not None:
+        return _disk_probe_cache
+    
+    _disk_probe_cache = {}
     try:
-        if not validate_file_safety(file_path):
-            raise ValueError(f"File failed safety validation: {file_path}")
+        if os.path.getsize(PROBE_CACHE_PATH) > MAX_PROBE_CACHE_SIZE:
+            logger.warning(f"Probe cache too large, ignoring: {PROBE_CACHE_PATH}")
+            return _disk_probe_cache
         
-        # Use absolute path and validate
-        abs_path = file_path.resolve()
+        with open(PROBE_CACHE_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
         
-        cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_format', '-show_streams', str(abs_path)
-        ]
+        if isinstance(data, dict):
+            _disk_probe_cache.update(data)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read probe cache {PROBE_CACHE_PATH}: {e}")
+    
+    return _disk_probe_cache
+
+def save_probe_cache():
+    """Write the persistent probe cache back to disk if it changed."""
+    global _disk_probe_cache_dirty
+    if not _disk_probe_cache_dirty or _disk_probe_cache is None:
+        return
+    
+    # Drop the oldest entries so the cache can't grow without bound
+    entries = list(_disk_probe_cache.items())[-MAX_PROBE_CACHE_ENTRIES:]
+    
+    try:
+        cache_dir = os.path.dirname(PROBE_CACHE_PATH)
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
         
-        # Run with timeout and capture output safely
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            timeout=30,  # 30 second timeout
-            check=True
-        )
-        
-        data = json.loads(result.stdout)
-        
-        metadata = {}
-        if 'format' in data and 'tags' in data['format']:
-            tags = data['format']['tags']
-            # Sanitize metadata values
-            for k, v in tags.items():
-                if isinstance(v, str):
-                    # Remove control characters and limit length
-                    clean_value = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', v)[:500]
-                    metadata[k.lower()] = clean_value
-        
-        return metadata
+        # Write to a temporary file and rename so a crash can't leave a partial cache
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', prefix='probes_', dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(dict(entries), f)
+            os.replace(tmp_path, PROBE_CACHE_PATH)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        
+        _disk_probe_cache_dirty = False
+    except OSError as e:
+        logger.warning(f"Could not write probe cache {PROBE_CACHE_PATH}: {e}")
+
+atexit.register(save_probe_cache)
+
+def _cached_probe(key: str, st: os.stat_result) -> Optional[dict]:
+    """Return the persisted probe for a file if its size and mtime still match."""
+    entry = _load_probe_cache().get(key)
+    if (isinstance(entry, dict) and isinstance(entry.get('probe'), dict) and
+            entry.get('mtime_ns') == st.st_mtime_ns and entry.get('size') == st.st_size):
+        return entry['probe']
+    return None
+
+def _store_probe(key: str, st: os.stat_result, probe_info: dict) -> None:
+    """Record a fresh probe in the persistent cache."""
+    global _disk_probe_cache_dirty
+    cache = _load_probe_cache()
+    # Re-insert so the most recently probed files are kept when trimming
+    cache.pop(key, None)
+    cache[key] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'probe': probe_info}
+    _disk_probe_cache_dirty = True
+
+def probe_all(audio_files: List[Path]) -> Dict[Path, dict]:
+    """Probe audio files in parallel, reusing cached results.
+    
+    Files that fail safety validation or probing map to an empty dict.
+    """
+    keys = {audio_file: str(audio_file) for audio_file in audio_files}
+    pending = []
+    for audio_file, key in keys.items():
+        if key in _PROBE_CACHE:
+            continue
+        if not validate_file_safety(audio_file):
+            logger.warning(f"File failed safety validation: {audio_file}")
+            _PROBE_CACHE[key] = {}
+            continue
         
-    except subprocess.TimeoutExpired:
-        logger.error(f"Timeout extracting metadata from {file_path}")
-        return {}
-    except subprocess.CalledProcessError as e:
-        logger.error(f"FFprobe failed for {file_path}: {e}")
-        return {}
-    except (json.JSONDecodeError, ValueError, OSError) as e:
+        # Validation recorded the file's stat result; reuse it for the cache key
+        cached = _cached_probe(key, _VALIDATED[key])
+        if cached is not None:
+            _PROBE_CACHE[key] = cached
+        else:
+            pending.append(audio_file)
+    
+    # ffprobe runs are independent per file, so dispatch them all at once
+    executor = ThreadPoolExecutor(max_workers=_CPU_COUNT)
+    futures = [executor.submit(_probe_file, f) for f in pending]
+    try:
+        wait(futures)
+    except BaseException:
+        # Ctrl-C or a signal handler's SystemExit: don't start ffprobe for
+        # the files still queued
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        raise
+    executor.shutdown()
+    
+    for audio_file, future in zip(pending, futures):
+        try:
+            data = future.result()
+        except subprocess.TimeoutExpired:
+            logger.error(f"Timeout probing {audio_file}")
+            data = {}
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFprobe failed for {audio_file}: {e}")
+            data = {}
+        except (json.JSONDecodeError, ValueError, OSError) as e:
+            logger.error(f"Error probing {audio_file}: {e}")
+            data = {}
+        _PROBE_CACHE[keys[audio_file]] = data
+        
+        if data:
+            _store_probe(keys[audio_file], _VALIDATED[keys[audio_file]], data)
+    
+    return {audio_file: _PROBE_CACHE[key] for audio_file, key in keys.items()}
+
+def _first_audio_stream(probe_info: dict) -> Optional[dict]:
+    """Return the first audio stream from ffprobe output, if any."""
+    return next((s for s in probe_info.get('streams', []) if s.get('codec_type') == 'audio'), None)
+
+def _probe_duration(probe_info: dict) -> float:
+    """Return the duration in seconds from ffprobe output.
+    
+    Uses the container duration, falling back to the audio stream's own duration
+    for files whose container doesn't report one.
+    """
+    duration = probe_info.get('format', {}).get('duration')
+    if duration is None:
+        stream = _first_audio_stream(probe_info)
+        duration = stream.get('duration') if stream else None
+    if duration is None:
+        raise ValueError("No duration reported by ffprobe")
+    return float(duration)
+
+def _metadata_from_probe(probe_info: dict) -> Dict[str, str]:
+    """Extract sanitized format tags from ffprobe output."""
+    metadata = {}
+    if 'format' in probe_info and 'tags' in probe_info['format']:
+        tags = probe_info['format']['tags']
+        # Sanitize metadata values
+        for k, v in tags.items():
+            if isinstance(v, str):
+                # Remove control characters and limit length
+                clean_value = v.translate(_CTRL_DEL)[:500]
+                metadata[k.lower()] = clean_value
+    
+    return metadata
+
+def get_file_metadata(file_path: Path) -> Dict[str, str]:
+    """Extract metadata from audio file with security validation."""
+    try:
+        return _metadata_from_probe(probe_all([file_path])[file_path])
+        
+    except (ValueError, OSError) as e:
         logger.error(f"Error processing metadata from {file_path}: {e}")
         return {}
     except Exception as e:
         logger.error(f"Unexpected error extracting metadata from {file_path}: {e}")
         return {}
 
-def get_chapter_name(audio_file: Path, index: int, chapter_mapping: Optional[Dict[str, str]] = None) -> str:
-    """Get chapter name with priority: -I file > metadata > filename."""
+def get_chapter_name(audio_file: Path, index: int, chapter_mapping: Optional[Dict[str, str]] = None,
+                     probe_info: Optional[dict] = None) -> str:
+    """Get chapter name with priority: -I file > metadata > filename.
+    
+    If probe_info (ffprobe output for audio_file) is given, metadata is read from it
+    instead of probing the file.
+    """
     try:
         filename = audio_file.name
         
@@ -375,7 +630,10 @@ def get_chapter_name(audio_file: Path, index: int, chapter_mapping: Optional[Dic
             return sanitize_chapter_name(chapter_mapping[filename])
         
         # Priority 2: metadata from file
-        metadata = get_file_metadata(audio_file)
+        if probe_info is not None:
+            metadata = _metadata_from_probe(probe_info)
+        else:
+            metadata = get_file_metadata(audio_file)
         if 'title' in metadata and metadata['title']:
             return sanitize_chapter_name(metadata['title'])
         
@@ -387,22 +645,33 @@ def get_chapter_name(audio_file: Path, index: int, chapter_mapping: Optional[Dic
         logger.warning(f"Error getting chapter name for {audio_file}: {e}")
         return f"Chapter {index + 1}"
 
+def _has_cover_art(probe_info: dict) -> bool:
+    """Check ffprobe output for an embedded picture stream."""
+    return any(
+        s.get('disposition', {}).get('attached_pic') == 1 or s.get('codec_type') == 'video'
+        for s in probe_info.get('streams', [])
+    )
+
 def extract_cover_art(audio_files: List[Path]) -> Optional[str]:
     """Extract cover art from audio files with security validation."""
     try:
+        # Only spawn ffmpeg for files that actually carry a picture
+        probes = probe_all(audio_files)
+        candidates = [f for f in audio_files if _has_cover_art(probes[f])]
+        if not candidates:
+            return None
+        
         cover_fd, cover_path = create_secure_temp(suffix='.jpg', prefix='audiobook_cover_')
         os.close(cover_fd)  # We just need the path
-        TEMP_FILES.append(cover_path)
+        TEMP_FILES.add(cover_path)
         
-        for audio_file in audio_files:
+        for audio_file in candidates:
             try:
                 if not validate_file_safety(audio_file):
                     continue
                 
-                abs_path = audio_file.resolve()
-                
                 cmd = [
-                    'ffmpeg', '-y', '-i', str(abs_path),
+                    'ffmpeg', '-y', '-i', str(audio_file),
                     '-an', '-vcodec', 'copy', cover_path
                 ]
                 
@@ -430,8 +699,8 @@ def extract_cover_art(audio_files: List[Path]) -> Optional[str]:
         # No cover art found, clean up temp file
         try:
             os.remove(cover_path)
-            TEMP_FILES.remove(cover_path)
-        except (OSError, ValueError):
+            TEMP_FILES.discard(cover_path)
+        except OSError:
             pass
         
         return None
@@ -446,56 +715,27 @@ def get_source_bitrate_and_codec(audio_files: List[Path]) -> Tuple[int, str]:
     codec_count = {}
     valid_files = 0
     
+    probes = probe_all(audio_files)
+    
     for audio_file in audio_files:
-        try:
-            if not validate_file_safety(audio_file):
-                continue
-            
-            abs_path = audio_file.resolve()
-            
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_streams', '-select_streams', 'a:0', str(abs_path)
-            ]
-            
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=30,
-                check=True
-            )
-            
-            data = json.loads(result.stdout)
+        stream = _first_audio_stream(probes[audio_file])
+        
+        if stream:
+            # Get bitrate
+            if 'bit_rate' in stream:
+                try:
+                    bitrate = int(stream['bit_rate']) // 1000  # Convert to kbps
+                    if 0 < bitrate < 10000:  # Reasonable range
+                        total_bitrate += bitrate
+                        valid_files += 1
+                except (ValueError, TypeError):
+                    continue
             
-            if 'streams' in data and len(data['streams']) > 0:
-                stream = data['streams'][0]
-                
-                # Get bitrate
-                if 'bit_rate' in stream:
-                    try:
-                        bitrate = int(stream['bit_rate']) // 1000  # Convert to kbps
-                        if 0 < bitrate < 10000:  # Reasonable range
-                            total_bitrate += bitrate
-                            valid_files += 1
-                    except (ValueError, TypeError):
-                        continue
-                
-                # Count codec
-                if 'codec_name' in stream:
-                    codec = str(stream['codec_name'])[:20]  # Limit codec name length
-                    if codec.isalnum() or codec in ['aac', 'mp3', 'flac', 'wav', 'ogg', 'wma', 'opus', 'vorbis']:
-                        codec_count[codec] = codec_count.get(codec, 0) + 1
-                        
-        except subprocess.TimeoutExpired:
-            logger.warning(f"Timeout analyzing {audio_file}")
-            continue
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"FFprobe failed for {audio_file}: {e}")
-            continue
-        except (json.JSONDecodeError, ValueError, OSError) as e:
-            logger.warning(f"Error analyzing {audio_file}: {e}")
-            continue
+            # Count codec
+            if 'codec_name' in stream:
+                codec = str(stream['codec_name'])[:20]  # Limit codec name length
+                if codec.isalnum() or codec in ['aac', 'mp3', 'flac', 'wav', 'ogg', 'wma', 'opus', 'vorbis']:
+                    codec_count[codec] = codec_count.get(codec, 0) + 1
     
     if valid_files == 0:
         logger.warning("No valid files for bitrate analysis, using defaults")
@@ -507,6 +747,32 @@ def get_source_bitrate_and_codec(audio_files: List[Path]) -> Tuple[int, str]:
     logger.info(f"Analyzed {valid_files} files: avg bitrate {avg_bitrate}k, codec {most_common_codec}")
     return avg_bitrate, most_common_codec
 
+def can_stream_copy(probes: Dict[Path, dict]) -> bool:
+    """Check whether all sources are AAC with matching audio parameters, so they can be muxed without re-encoding."""
+    audio_params = set()
+    for probe_info in probes.values():
+        stream = _first_audio_stream(probe_info)
+        if not stream or stream.get('codec_name') != 'aac':
+            return False
+        if stream.get('channels') not in (1, 2):
+            return False
+        # LC and HE-AAC both report codec 'aac' with the same output rate and
+        # channels, so the profile is needed to tell them apart
+        if not stream.get('profile'):
+            return False
+        audio_params.add((
+            stream.get('sample_rate'),
+            stream.get('channels'),
+            stream.get('profile'),
+            stream.get('codec_tag_string'),
+            stream.get('time_base'),
+            stream.get('extradata_size'),
+        ))
+    
+    # The concat demuxer can only copy streams that share the same decoder
+    # configuration; it reuses the first file's AudioSpecificConfig
+    return len(audio_params) == 1
+
 def calculate_optimal_aac_bitrate(source_bitrate, source_codec):
     """Calculate optimal AAC bitrate for equivalent quality."""
     # Codec efficiency ratios compared to AAC (AAC = 1.0)
@@ -542,13 +808,81 @@ def calculate_optimal_aac_bitrate(source_bitrate, source_codec):
     else:
         return 128  # Cap at 128k for audiobooks
 
-def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False, title_override=None, input_dir=None):
+def run_ffmpeg(cmd: List[str], input_data: bytes, total_duration: float, timeout: int = 3600) -> Tuple[int, str]:
+    """Run ffmpeg with progress reporting and return its exit code and the tail of stderr.
+    
+    The command must include '-progress pipe:1'. input_data is written to ffmpeg's stdin.
+    """
+    stderr_tail = bytearray()
+    progress_shown = False
+    
+    with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        
+        def feed_stdin():
+            try:
+                proc.stdin.write(input_data)
+            except OSError:
+                pass  # ffmpeg exited early; its exit code reports why
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+        
+        def read_progress():
+            nonlocal progress_shown
+            last_percent = -1
+            for line in proc.stdout:
+                # out_time_ms is reported in microseconds despite its name
+                if not line.startswith(b'out_time_ms=') or total_duration <= 0:
+                    continue
+                try:
+                    elapsed = int(line.split(b'=', 1)[1]) / 1000000
+                except ValueError:
+                    continue  # 'N/A' before the first frame
+                percent = min(100, int(elapsed * 100 / total_duration))
+                if percent != last_percent:
+                    print(f"\rEncoding: {percent}%", end='', flush=True)
+                    last_percent = percent
+                    progress_shown = True
+        
+        def read_stderr():
+            for chunk in iter(lambda: proc.stderr.read(4096), b''):
+                stderr_tail.extend(chunk)
+                if len(stderr_tail) > MAX_FFMPEG_STDERR:
+                    del stderr_tail[:-MAX_FFMPEG_STDERR]
+        
+        threads = [threading.Thread(target=target, daemon=True)
+                   for target in (feed_stdin, read_progress, read_stderr)]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            proc.wait(timeout=timeout)
+        except BaseException:
+            # Timeout, Ctrl-C or a signal handler's SystemExit: don't leave
+            # ffmpeg running while the reader threads wait for it to finish
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+            if progress_shown:
+                print()
+    
+    return proc.returncode, stderr_tail.decode('utf-8', errors='replace')
+
+def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False, title_override=None, input_dir=None, force_reencode=False):
     if not audio_files:
         print("No audio files found!")
         return False
     
     print(f"Processing {len(audio_files)} audio files...")
     
+    # Probe every file once up front; later lookups hit the cache
+    probes = probe_all(audio_files)
+    
     # Extract metadata from first file for audiobook info
     first_file_metadata = get_file_metadata(audio_files[0])
     
@@ -591,66 +925,44 @@ def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False,
     print(f"Audiobook: '{book_title}' by {book_artist}")
     
     # Analyze source files for optimal bitrate (unless quick mode)
+    stream_copy = False
     if not quick_mode:
         source_bitrate, source_codec = get_source_bitrate_and_codec(audio_files)
-        optimal_bitrate = calculate_optimal_aac_bitrate(source_bitrate, source_codec)
-        print(f"Source: {source_bitrate}k {source_codec} -> Optimal AAC: {optimal_bitrate}k")
+        stream_copy = source_codec == 'aac' and not force_reencode and can_stream_copy(probes)
+        if stream_copy:
+            print(f"Source: {source_bitrate}k {source_codec} -> Copying AAC stream without re-encoding")
+        else:
+            optimal_bitrate = calculate_optimal_aac_bitrate(source_bitrate, source_codec)
+            print(f"Source: {source_bitrate}k {source_codec} -> Optimal AAC: {optimal_bitrate}k")
     else:
         optimal_bitrate = 16  # Quick mode override
         print("Quick mode: Using 16k AAC")
     
-    # Create temporary files for ffmpeg securely
-    file_list_fd, file_list_path = create_secure_temp(suffix='.txt', prefix='audiobook_files_')
-    os.close(file_list_fd)
-    TEMP_FILES.append(file_list_path)
-    
-    chapter_list_fd, chapter_list_path = create_secure_temp(suffix='.txt', prefix='audiobook_chapters_')
-    os.close(chapter_list_fd)
-    TEMP_FILES.append(chapter_list_path)
-    
     # Extract cover art
     cover_path = extract_cover_art(audio_files)
     if cover_path:
         print("Found cover art in audio files")
     
     try:
-        # Create file list for concatenation with validation
-        with open(file_list_path, 'w', encoding='utf-8') as f:
-            for audio_file in audio_files:
-                if not validate_file_safety(audio_file):
-                    raise ValueError(f"File failed safety validation: {audio_file}")
-                
-                abs_path = audio_file.resolve()
-                # Escape single quotes in path for ffmpeg
-                escaped_path = str(abs_path).replace("'", "'\"'\"'")
-                f.write(f"file '{escaped_path}'\n")
+        # Build file list for concatenation with validation; it is fed to ffmpeg on stdin
+        file_list = []
+        for audio_file in audio_files:
+            if not validate_file_safety(audio_file):
+                raise ValueError(f"File failed safety validation: {audio_file}")
+            
+            # Escape single quotes in path for ffmpeg
+            escaped_path = str(audio_file).replace("'", "'\"'\"'")
+            file_list.append(f"file '{escaped_path}'\n")
         
         # Create chapter metadata with proper naming priority
         chapters = []
         current_time = 0
+        
         for i, audio_file in enumerate(audio_files):
-            chapter_name = get_chapter_name(audio_file, i, chapter_mapping)
+            chapter_name = get_chapter_name(audio_file, i, chapter_mapping, probes[audio_file])
             
-            # Get duration of current file with security validation
             try:
-                if not validate_file_safety(audio_file):
-                    raise ValueError(f"File failed safety validation: {audio_file}")
-                
-                abs_path = audio_file.resolve()
-                duration_cmd = [
-                    'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                    '-of', 'csv=p=0', str(abs_path)
-                ]
-                
-                result = subprocess.run(
-                    duration_cmd, 
-                    capture_output=True, 
-                    text=True, 
-                    timeout=30,
-                    check=True
-                )
-                
-                duration = float(result.stdout.strip())
+                duration = _probe_duration(probes[audio_file])
                 if duration <= 0 or duration > 86400:  # Max 24 hours per file
                     raise ValueError(f"Invalid duration: {duration}")
                 
@@ -661,7 +973,7 @@ def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False,
                 })
                 current_time += duration
                 
-            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError) as e:
+            except ValueError as e:
                 logger.warning(f"Could not get duration for {audio_file}: {e}")
                 chapters.append({
                     'start': current_time,
@@ -671,51 +983,77 @@ def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False,
                 current_time += 1
         
         # Build ffmpeg command for proper m4b audiobook format
-        import multiprocessing
-        cpu_count = multiprocessing.cpu_count()
-        
         cmd = [
-            'ffmpeg', '-y', '-threads', str(cpu_count), '-f', 'concat', '-safe', '0', '-i', file_list_path
+            'ffmpeg', '-y', '-progress', 'pipe:1', '-nostats', '-loglevel', 'error',
+            '-f', 'concat', '-safe', '0',
+            '-protocol_whitelist', 'file,pipe', '-i', 'pipe:0'
         ]
         
         # Add cover art if available
         if cover_path and os.path.exists(cover_path):
             cmd.extend(['-i', cover_path])
         
-        # Add chapter metadata with sanitization
-        with open(chapter_list_path, 'w', encoding='utf-8') as f:
-            f.write(";FFMETADATA1\n")
-            f.write(f"title={sanitize_chapter_name(book_title)}\n")
-            f.write(f"artist={sanitize_chapter_name(book_artist)}\n")
-            f.write(f"album={sanitize_chapter_name(book_title)}\n")
-            f.write(f"genre={sanitize_chapter_name(book_genre)}\n")
-            f.write("media_type=2\n")
+        # Newer ffmpeg can take chapters straight from the concat list, with titles set
+        # per chapter on the output; older releases, and chapter sets whose titles
+        # would make the command line too long, use a separate FFMETADATA input
+        chapter_args = []
+        if get_ffmpeg_version() >= CONCAT_CHAPTERS_MIN_FFMPEG:
+            for i, chapter in enumerate(chapters):
+                chapter_args.extend([f'-metadata:c:{i}', f"title={chapter['title']}"])
+        # Count a separator and quoting for each argument
+        inline_chapters = (bool(chapter_args) and
+                           sum(len(arg) + 3 for arg in chapter_args) <= MAX_INLINE_CHAPTER_ARGS_LENGTH)
+        if inline_chapters:
+            for i, chapter in enumerate(chapters):
+                file_list.append(f"chapter {i} {chapter['start']:.3f} {chapter['end']:.3f}\n")
+        else:
+            # Create temporary file for ffmpeg securely
+            chapter_list_fd, chapter_list_path = create_secure_temp(suffix='.txt', prefix='audiobook_chapters_')
+            os.close(chapter_list_fd)
+            TEMP_FILES.add(chapter_list_path)
+            
+            # Add chapter metadata with sanitization, built in memory and written once
+            metadata_lines = [
+                ";FFMETADATA1\n",
+                f"title={sanitize_chapter_name(book_title)}\n",
+                f"artist={sanitize_chapter_name(book_artist)}\n",
+                f"album={sanitize_chapter_name(book_title)}\n",
+                f"genre={sanitize_chapter_name(book_genre)}\n",
+                "media_type=2\n",
+            ]
             for chapter in chapters:
-                f.write(f"[CHAPTER]\n")
-                f.write(f"TIMEBASE=1/1000\n")
-                f.write(f"START={int(chapter['start'] * 1000)}\n")
-                f.write(f"END={int(chapter['end'] * 1000)}\n")
-                f.write(f"title={chapter['title']}\n")
-        
-        metadata_input_index = 2 if cover_path else 1
-        cmd.extend(['-i', chapter_list_path, '-map_metadata', str(metadata_input_index)])
+                metadata_lines.extend([
+                    "[CHAPTER]\n",
+                    "TIMEBASE=1/1000\n",
+                    f"START={int(chapter['start'] * 1000)}\n",
+                    f"END={int(chapter['end'] * 1000)}\n",
+                    f"title={chapter['title']}\n",
+                ])
+            Path(chapter_list_path).write_text(''.join(metadata_lines), encoding='utf-8')
+            
+            metadata_input_index = 2 if cover_path else 1
+            cmd.extend(['-i', chapter_list_path, '-map_metadata', str(metadata_input_index)])
         
         # Add encoding options after all inputs
-        bitrate = f'{optimal_bitrate}k'
+        if stream_copy:
+            # Sources are already AAC, so only remux
+            audio_options = ['-c:a', 'copy']
+        else:
+            bitrate = f'{optimal_bitrate}k'
+            # Prefer libfdk_aac when available: faster and better quality at the same bitrate
+            if 'libfdk_aac' in get_ffmpeg_encoders():
+                audio_options = ['-c:a', 'libfdk_aac']
+            else:
+                audio_options = ['-c:a', 'aac', '-aac_coder', 'fast']
+            audio_options.extend(['-b:a', bitrate, '-ac', '2', '-ar', '44100'])
         
         # Map audio stream and cover art if available
         if cover_path:
-            cmd.extend([
-                '-map', '0:a', '-map', '1:v',
-                '-c:a', 'aac', '-aac_coder', 'fast', '-threads:a', str(cpu_count),
-                '-b:a', bitrate, '-ac', '2', '-ar', '44100',
-                '-c:v', 'copy', '-disposition:v:0', 'attached_pic'
-            ])
+            cmd.extend(['-map', '0:a', '-map', '1:v'])
+            cmd.extend(audio_options)
+            cmd.extend(['-c:v', 'copy', '-disposition:v:0', 'attached_pic'])
         else:
-            cmd.extend([
-                '-c:a', 'aac', '-aac_coder', 'fast', '-threads:a', str(cpu_count),
-                '-b:a', bitrate, '-ac', '2', '-ar', '44100'
-            ])
+            cmd.extend(audio_options)
         
         # Add final metadata and output with sanitization
         safe_title = sanitize_chapter_name(book_title)
@@ -732,19 +1070,17 @@ def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False,
             '-f', 'ipod'
         ])
         
+        if inline_chapters:
+            cmd.extend(chapter_args)
+        
         cmd.append(output_path)
         
         logger.info("Creating m4b file...")
         
-        # Run ffmpeg with timeout and security measures
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            timeout=3600  # 1 hour timeout
-        )
+        # Run ffmpeg with timeout and security measures; the concat list is read as UTF-8
+        returncode, stderr = run_ffmpeg(cmd, ''.join(file_list).encode('utf-8'), current_time)
         
-        if result.returncode == 0:
+        if returncode == 0:
             # Verify output file was created and has reasonable size
             if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
                 logger.info(f"Successfully created: {output_path}")
@@ -753,9 +1089,9 @@ def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False,
                 logger.error("Output file was not created or is empty")
                 return False
         else:
-            logger.error(f"FFmpeg failed with return code {result.returncode}")
-            if result.stderr:
-                logger.error(f"FFmpeg error: {result.stderr[:1000]}")  # Limit error output
+            logger.error(f"FFmpeg failed with return code {returncode}")
+            if stderr:
+                logger.error(f"FFmpeg error: {stderr[-1000:]}")  # Limit error output
             return False
             
     except subprocess.TimeoutExpired:
@@ -774,6 +1110,16 @@ def create_m4b(audio_files, output_path, chapter_mapping=None, quick_mode=False,
 def validate_output_path(output_path: str) -> str:
     """Validate and sanitize output path."""
     try:
+        # Validate file extension first; it is a pure string check
+        if output_path[-4:].lower() != '.m4b':
+            raise ValueError("Output file must have .m4b extension")
+        
+        # Cap the raw input length before resolving it. This is deliberately
+        # stricter than the resolved check below: input that abspath would
+        # normalize back under the limit (e.g. repeated './') is still refused
+        if len(output_path) > MAX_PATH_LENGTH:
+            raise ValueError(f"Output path too long: {len(output_path)} > {MAX_PATH_LENGTH}")
+        
         # Check if path is absolute or relative
         abs_output = os.path.abspath(output_path)
         
@@ -782,15 +1128,11 @@ def validate_output_path(output_path: str) -> str:
             raise ValueError(f"Output path too long: {len(abs_output)} > {MAX_PATH_LENGTH}")
         
         # Check for path traversal attempts
-        if '..' in output_path or output_path.startswith('/'):
+        if _TRAVERSAL_RE.search(output_path):
             # Allow if it's explicitly absolute, but validate
-            if not output_path.startswith(os.path.expanduser('~')) and not output_path.startswith('/tmp'):
+            if not output_path.startswith(_TRUSTED_OUTPUT_PREFIXES):
                 security_logger.warning(f"Potentially unsafe output path: {output_path}")
         
-        # Validate file extension
-        if not abs_output.lower().endswith('.m4b'):
-            raise ValueError("Output file must have .m4b extension")
-        
         # Sanitize filename component
         dir_path = os.path.dirname(abs_output)
         filename = os.path.basename(abs_output)
@@ -802,22 +1144,37 @@ def validate_output_path(output_path: str) -> str:
         logger.error(f"Output path validation failed: {e}")
         raise
 
-def safe_makedirs(path: str) -> None:
-    """Safely create directories with validation."""
+def safe_makedirs(path: str, already_abs: bool = False) -> None:
+    """Safely create directories with validation.
+
+    Pass already_abs=True when path is already absolute and normalized
+    (e.g. derived from validate_output_path) to skip resolving it again.
+    """
     try:
-        abs_path = os.path.abspath(path)
+        abs_path = path if already_abs else os.path.abspath(path)
         
         # Check path length
         if len(abs_path) > MAX_PATH_LENGTH:
             raise ValueError(f"Path too long: {len(abs_path)}")
         
-        # Check for suspicious patterns
-        if any(part.startswith('.') for part in Path(abs_path).parts[1:]):
-            security_logger.warning(f"Creating directory with hidden components: {abs_path}")
+        # Create directory safely; an existing one is left alone
+        try:
+            os.mkdir(abs_path, mode=0o755)
+        except FileExistsError:
+            created = False
+        except FileNotFoundError:
+            # Missing parents as well
+            os.makedirs(abs_path, mode=0o755, exist_ok=True)
+            created = True
+        else:
+            created = True
         
-        # Create directory safely
-        os.makedirs(abs_path, mode=0o755, exist_ok=True)
-        logger.info(f"Created output directory: {abs_path}")
+        # Check for suspicious patterns; abs_path is normalized, so any component
+        # starting with a dot follows a separator
+        if created and os.sep + '.' in abs_path:
+            security_logger.warning(f"Created directory with hidden components: {abs_path}")
+        
+        logger.info(f"Output directory ready: {abs_path}")
         
     except (OSError, ValueError) as e:
         logger.error(f"Failed to create directory {path}: {e}")
@@ -839,11 +1196,18 @@ def main():
             if len(input_dir) > MAX_PATH_LENGTH:
                 raise ValueError(f"Input path too long: {len(input_dir)} > {MAX_PATH_LENGTH}")
             
-            # Check if directory exists and is actually a directory
-            if not os.path.exists(input_dir):
-                raise ValueError(f"Input directory does not exist: {args.input}")
+            # Check if directory exists and is actually a directory, with a single stat
+            try:
+                input_stat = os.stat(input_dir)
+            except (FileNotFoundError, NotADirectoryError):
+                raise ValueError(f"Input directory does not exist: {args.input}") from None
+            except PermissionError:
+                raise ValueError(f"Input directory is not readable: {args.input}") from None
+            except OSError as e:
+                # e.g. a symlink loop or an over-long path component
+                raise ValueError(f"Input directory is not accessible: {args.input} ({e})") from None
             
-            if not os.path.isdir(input_dir):
+            if not stat.S_ISDIR(input_stat.st_mode):
                 raise ValueError(f"Input path is not a directory: {args.input}")
             
             # Check for readable access
@@ -863,7 +1227,7 @@ def main():
         
         # Get audio files with security validation
         try:
-            audio_files = get_audio_files(args.input)
+            audio_files = get_audio_files(input_dir)
             if not audio_files:
                 logger.error(f"No valid audio files found in '{args.input}'")
                 sys.exit(1)
@@ -883,30 +1247,37 @@ def main():
                 if len(index_path) > MAX_PATH_LENGTH:
                     raise ValueError(f"Index file path too long: {len(index_path)}")
                 
-                if not os.path.exists(index_path):
-                    raise ValueError(f"Index file does not exist: {args.index}")
+                try:
+                    index_stat = os.stat(index_path)
+                except (FileNotFoundError, NotADirectoryError):
+                    raise ValueError(f"Index file does not exist: {args.index}") from None
+                except PermissionError:
+                    raise ValueError(f"Index file is not readable: {args.index}") from None
+                except OSError as e:
+                    raise ValueError(f"Index file is not accessible: {args.index} ({e})") from None
                 
-                if not os.path.isfile(index_path):
+                if not stat.S_ISREG(index_stat.st_mode):
                     raise ValueError(f"Index path is not a file: {args.index}")
                 
                 if not os.access(index_path, os.R_OK):
                     raise ValueError(f"Index file is not readable: {args.index}")
                 
-                chapter_mapping, file_order = parse_index_file(args.index)
+                chapter_mapping, file_order = parse_index_file(index_path)
                 
-                # Reorder audio files based on index file
-                ordered_files = []
+                # Reorder audio files based on index file, reading each name only once
+                name_to_idx = {f.name: i for i, f in enumerate(audio_files)}
+                ordered_idx = []
                 for filename in file_order:
-                    matching_file = next((f for f in audio_files if f.name == filename), None)
-                    if matching_file:
-                        ordered_files.append(matching_file)
+                    idx = name_to_idx.get(filename)
+                    if idx is not None:
+                        ordered_idx.append(idx)
                     else:
                         logger.warning(f"File '{filename}' from index not found in input directory")
                 
                 # Add any remaining files not in the index
-                for audio_file in audio_files:
-                    if audio_file not in ordered_files:
-                        ordered_files.append(audio_file)
+                placed = set(ordered_idx)
+                ordered_files = [audio_files[i] for i in ordered_idx]
+                ordered_files.extend(f for i, f in enumerate(audio_files) if i not in placed)
                 
                 audio_files = ordered_files
                 logger.info(f"Using custom chapter ordering from '{args.index}'")
@@ -915,17 +1286,17 @@ def main():
                 logger.error(f"Error parsing index file: {e}")
                 sys.exit(1)
         
-        # Create output directory if it doesn't exist
+        # Create output directory if it doesn't exist (makedirs tolerates an existing one)
         output_dir = os.path.dirname(validated_output)
-        if output_dir and not os.path.exists(output_dir):
+        if output_dir:
             try:
-                safe_makedirs(output_dir)
+                safe_makedirs(output_dir, already_abs=True)
             except (OSError, ValueError) as e:
                 logger.error(f"Failed to create output directory: {e}")
                 sys.exit(1)
         
         # Create m4b file
-        success = create_m4b(audio_files, validated_output, chapter_mapping, args.quick, args.title, args.input)
+        success = create_m4b(audio_files, validated_output, chapter_mapping, args.quick, args.title, input_dir, args.force_reencode)
         
         if not success:
             sys.exit(1)
@@ -22,9 +22,26 @@ from main import (
     validate_output_path
 )
 
+# Report lines are buffered and written in one go rather than per print(). Tests
+# flush before calls that may log so the report stays next to the log output
+_LINES = []
+
+def _emit(line):
+    """Queue a report line for the next flush."""
+    _LINES.append(line + "\n")
+
+def _flush():
+    """Write all queued report lines to stdout in a single call."""
+    sys.stdout.write("".join(_LINES))
+    sys.stdout.flush()
+    _LINES.clear()
+
+# Shell metacharacters that must never survive filename sanitization
+_DANGEROUS = str.maketrans('', '', ';&|`$(){}[]<>')
+
 def test_filename_sanitization():
     """Test filename sanitization against injection attacks."""
-    print("Testing filename sanitization...")
+    _emit("Testing filename sanitization...")
     
     # Test cases with malicious inputs
     test_cases = [
@@ -41,18 +58,16 @@ def test_filename_sanitization():
     for input_name, expected in test_cases:
         try:
             result = sanitize_filename(input_name)
-            print(f"✓ '{input_name}' -> '{result}'")
+            _emit(f"✓ '{input_name}' -> '{result}'")
             # Verify no dangerous characters remain
-            dangerous_chars = [';', '&', '|', '`', '$', '(', ')', '{', '}', '[', ']', '<', '>']
-            has_dangerous = any(char in result for char in dangerous_chars)
-            if has_dangerous:
-                print(f"  WARNING: Dangerous characters still present in '{result}'")
+            if len(result.translate(_DANGEROUS)) != len(result):
+                _emit(f"  WARNING: Dangerous characters still present in '{result}'")
         except Exception as e:
-            print(f"✗ Error sanitizing '{input_name}': {e}")
+            _emit(f"✗ Error sanitizing '{input_name}': {e}")
 
 def test_chapter_name_sanitization():
     """Test chapter name sanitization."""
-    print("\nTesting chapter name sanitization...")
+    _emit("\nTesting chapter name sanitization...")
     
     test_cases = [
         ("Chapter 1", "Chapter 1"),
@@ -65,11 +80,11 @@ def test_chapter_name_sanitization():
     
     for input_name, expected in test_cases:
         result = sanitize_chapter_name(input_name)
-        print(f"✓ '{input_name}' -> '{result}'")
+        _emit(f"✓ '{input_name}' -> '{result}'")
 
 def test_path_validation():
     """Test path traversal prevention."""
-    print("\nTesting path validation...")
+    _emit("\nTesting path validation...")
     
     base_dir = "/tmp/test_audiobook"
     
@@ -82,16 +97,17 @@ def test_path_validation():
     ]
     
     for test_path, expected in test_cases:
+        _flush()
         try:
             result = validate_path_within_base(test_path, base_dir)
             status = "✓" if result == expected else "✗"
-            print(f"{status} '{test_path}' -> {result} (expected {expected})")
+            _emit(f"{status} '{test_path}' -> {result} (expected {expected})")
         except Exception as e:
-            print(f"✗ Error validating '{test_path}': {e}")
+            _emit(f"✗ Error validating '{test_path}': {e}")
 
 def test_safe_path_join():
     """Test safe path joining."""
-    print("\nTesting safe path joining...")
+    _emit("\nTesting safe path joining...")
     
     base_dir = "/tmp/test_audiobook"
     
@@ -103,21 +119,22 @@ def test_safe_path_join():
     ]
     
     for paths, should_succeed in test_cases:
+        _flush()
         try:
             result = safe_path_join(base_dir, *paths)
             if should_succeed:
-                print(f"✓ join({base_dir}, {paths}) -> {result}")
+                _emit(f"✓ join({base_dir}, {paths}) -> {result}")
             else:
-                print(f"✗ Expected failure but got: {result}")
+                _emit(f"✗ Expected failure but got: {result}")
         except ValueError as e:
             if not should_succeed:
-                print(f"✓ Correctly rejected: {paths} ({e})")
+                _emit(f"✓ Correctly rejected: {paths} ({e})")
             else:
-                print(f"✗ Unexpected failure: {paths} ({e})")
+                _emit(f"✗ Unexpected failure: {paths} ({e})")
 
 def test_output_path_validation():
     """Test output path validation."""
-    print("\nTesting output path validation...")
+    _emit("\nTesting output path validation...")
     
     test_cases = [
         ("output.m4b", True),
@@ -128,21 +145,22 @@ def test_output_path_validation():
     ]
     
     for test_path, should_succeed in test_cases:
+        _flush()
         try:
             result = validate_output_path(test_path)
             if should_succeed:
-                print(f"✓ '{test_path}' -> '{result}'")
+                _emit(f"✓ '{test_path}' -> '{result}'")
             else:
-                print(f"✗ Expected failure but got: {result}")
+                _emit(f"✗ Expected failure but got: {result}")
         except ValueError as e:
             if not should_succeed:
-                print(f"✓ Correctly rejected: '{test_path}' ({e})")
+                _emit(f"✓ Correctly rejected: '{test_path}' ({e})")
             else:
-                print(f"✗ Unexpected failure: '{test_path}' ({e})")
+                _emit(f"✗ Unexpected failure: '{test_path}' ({e})")
 
 def test_file_safety_validation():
     """Test file safety validation."""
-    print("\nTesting file safety validation...")
+    _emit("\nTesting file safety validation...")
     
     # Create a test directory and files
     test_dir = Path("/tmp/audiobook_security_test")
@@ -163,40 +181,51 @@ def test_file_safety_validation():
         
         # Test validation
         if validate_file_safety(normal_file):
-            print("✓ Normal file passed validation")
+            _emit("✓ Normal file passed validation")
         else:
-            print("✗ Normal file failed validation")
+            _emit("✗ Normal file failed validation")
         
         if suspicious_created:
+            _flush()
             if not validate_file_safety(suspicious_file):
-                print("✓ Suspicious file correctly rejected")
+                _emit("✓ Suspicious file correctly rejected")
             else:
-                print("✗ Suspicious file incorrectly accepted")
+                _emit("✗ Suspicious file incorrectly accepted")
         else:
-            print("✓ Suspicious filename prevented file creation")
+            _emit("✓ Suspicious filename prevented file creation")
             
     finally:
         # Cleanup
         shutil.rmtree(test_dir, ignore_errors=True)
 
+TESTS = (
+    test_filename_sanitization,
+    test_chapter_name_sanitization,
+    test_path_validation,
+    test_safe_path_join,
+    test_output_path_validation,
+    test_file_safety_validation,
+)
+
 def main():
     """Run all security tests."""
-    print("=== Audiobook Creator Security Tests ===\n")
+    _emit("=== Audiobook Creator Security Tests ===\n")
     
     try:
-        test_filename_sanitization()
-        test_chapter_name_sanitization()
-        test_path_validation()
-        test_safe_path_join()
-        test_output_path_validation()
-        test_file_safety_validation()
+        for test in TESTS:
+            test()
+            # Flush per test so the report stays next to the log output it triggers
+            _flush()
         
-        print("\n=== Security Tests Completed ===")
-        print("All security fixes appear to be working correctly.")
+        _emit("\n=== Security Tests Completed ===")
+        _emit("All security fixes appear to be working correctly.")
         
     except Exception as e:
-        print(f"\n✗ Test failed with error: {e}")
+        _emit(f"\n✗ Test failed with error: {e}")
+        _flush()
         sys.exit(1)
+    
+    _flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
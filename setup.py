@@ -3,9 +3,15 @@
 from setuptools import setup
 import re
 
-# Read version from main.py
+# Read version from main.py, stopping at the first match
 with open('main.py', 'r') as f:
-    version = re.search(r'__version__ = [\'"]([^\'"]*)[\'"]', f.read()).group(1)
+    for line in f:
+        match = re.match(r'__version__\s*=\s*[\'"]([^\'"]+)[\'"]', line)
+        if match:
+            version = match.group(1)
+            break
+    else:
+        raise RuntimeError('Unable to find __version__ in main.py')
 
 # Read long description from README
 with open('README.md', 'r', encoding='utf-8') as f:
@@ -38,6 +44,9 @@ setup(
         'Topic :: Utilities',
     ],
     python_requires='>=3.6',
+    extras_require={
+        'fast': ['orjson'],
+    },
     entry_points={
         'console_scripts': [
             'audiobook-creator=main:main',